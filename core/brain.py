@@ -1,15 +1,32 @@
 """Central Brain - Query routing and command orchestration"""
 
 import re
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import time
+import asyncio
+import hashlib
+import threading
+import orjson
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Iterator
+from openai import OpenAI, AsyncOpenAI
 
 class Brain:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, cache_size: int = 512, cache_ttl: float = 3600):
         self.client = OpenAI(api_key=openai_api_key)
+        # AsyncOpenAI's connection pool is bound to one event loop, so the async
+        # client is created per running loop (see _async_client)
+        self._openai_api_key = openai_api_key
+        self._aclient = None
+        self._aclient_loop = None
         self.command_registry = {}
         self.command_patterns = []
         
+        # LRU cache of LLM responses: query digest -> (expiry time, response text)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._llm_cache = OrderedDict()
+        self._llm_cache_lock = threading.Lock()
+        
     def register_module(self, module_name: str, patterns: list, handler):
         """Register a module with its trigger patterns and handler function"""
         self.command_registry[module_name] = {
@@ -20,9 +37,8 @@ class Brain:
         for pattern in patterns:
             self.command_patterns.append((re.compile(pattern, re.IGNORECASE), handler))
     
-    def process_query(self, query: str) -> Dict[str, Any]:
-        """Main routing function - determines if query should go to handler or LLM"""
-        # First check if query matches any predefined command patterns
+    def _match_command(self, query: str) -> Optional[Dict[str, Any]]:
+        """Run the handler of the first command pattern matching the query, if any"""
         for pattern, handler in self.command_patterns:
             if pattern.search(query):
                 return {
@@ -30,26 +46,170 @@ class Brain:
                     'handler': handler,
                     'response': handler(query)
                 }
+        return None
+    
+    def process_query(self, query: str) -> Dict[str, Any]:
+        """Main routing function - determines if query should go to handler or LLM"""
+        # First check if query matches any predefined command patterns
+        result = self._match_command(query)
+        if result is not None:
+            return result
         
         # If no pattern matches, route to LLM
         return self._route_to_llm(query)
     
-    def _route_to_llm(self, query: str) -> Dict[str, Any]:
-        """Send query to OpenAI API for complex natural language understanding"""
+    def _async_client(self) -> AsyncOpenAI:
+        """AsyncOpenAI client for the running event loop
+        
+        A new client is created whenever the loop changes, e.g. on each
+        asyncio.run(), since pooled connections can't be reused across loops.
+        """
+        loop = asyncio.get_running_loop()
+        if self._aclient_loop is not loop:
+            self._aclient = AsyncOpenAI(api_key=self._openai_api_key)
+            self._aclient_loop = loop
+        return self._aclient
+    
+    async def aprocess_query(self, query: str) -> Dict[str, Any]:
+        """Async variant of process_query - LLM requests don't block the event loop"""
+        result = self._match_command(query)
+        if result is not None:
+            return result
+        
+        return await self._route_to_llm_async(query)
+    
+    async def process_many(self, queries: List[str], max_concurrency: int = 20) -> List[Dict[str, Any]]:
+        """Process several queries concurrently, overlapping their API round-trips
+        
+        Args:
+            queries: Queries to process
+            max_concurrency: Maximum number of requests in flight at once
+            
+        Returns:
+            Results in the same order as the queries
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(query: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.aprocess_query(query)
+        
+        return await asyncio.gather(*(run(query) for query in queries))
+    
+    def _llm_request(self, query: str) -> Dict[str, Any]:
+        """Build the chat completion arguments for a free-form query"""
+        return {
+            'model': "gpt-4",
+            'messages': [
+                {"role": "system", "content": "You are Jarvis, a helpful AI assistant. Respond concisely and accurately."},
+                {"role": "user", "content": query}
+            ],
+            'temperature': 0.7,
+            'max_tokens': 500
+        }
+    
+    @staticmethod
+    def _cache_key(query: str) -> bytes:
+        """Digest of the normalized query used as the response cache key"""
+        return hashlib.blake2b(query.strip().lower().encode('utf-8'), digest_size=16).digest()
+    
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        """Return a cached, unexpired LLM response or None"""
+        with self._llm_cache_lock:
+            entry = self._llm_cache.get(key)
+            if entry is None:
+                return None
+            expires, response = entry
+            if expires < time.monotonic():
+                del self._llm_cache[key]
+                return None
+            self._llm_cache.move_to_end(key)
+            return response
+    
+    def _cache_put(self, key: bytes, response: str):
+        """Store an LLM response, evicting the least recently used entry when full"""
+        with self._llm_cache_lock:
+            self._llm_cache[key] = (time.monotonic() + self.cache_ttl, response)
+            self._llm_cache.move_to_end(key)
+            while len(self._llm_cache) > self.cache_size:
+                self._llm_cache.popitem(last=False)
+    
+    def _route_to_llm(self, query: str, cacheable: bool = True) -> Dict[str, Any]:
+        """Send query to OpenAI API for complex natural language understanding
+        
+        Args:
+            query: User query
+            cacheable: Reuse / store the response for identical queries. Pass False
+                when a fresh (differently sampled) answer is wanted.
+        """
+        key = self._cache_key(query)
+        if cacheable:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return {'type': 'llm', 'response': cached}
+        
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are Jarvis, a helpful AI assistant. Respond concisely and accurately."},
-                    {"role": "user", "content": query}
-                ],
-                temperature=0.7,
-                max_tokens=500
-            )
+            response = self.client.chat.completions.create(**self._llm_request(query))
+            content = response.choices[0].message.content
+            if cacheable:
+                self._cache_put(key, content)
+            
+            return {
+                'type': 'llm',
+                'response': content
+            }
+        except Exception as e:
+            return {
+                'type': 'error',
+                'response': f"Error communicating with LLM: {str(e)}"
+            }
+    
+    def _route_to_llm_stream(self, query: str, cacheable: bool = True) -> Iterator[str]:
+        """Stream the LLM response text piece by piece as it is generated
+        
+        Lets the caller (e.g. VoiceOutput.speak_stream) start speaking before the
+        whole completion has arrived. Errors are yielded as a message.
+        """
+        key = self._cache_key(query)
+        if cacheable:
+            cached = self._cache_get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        try:
+            stream = self.client.chat.completions.create(**self._llm_request(query), stream=True)
+            parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    yield text
+            
+            if cacheable:
+                self._cache_put(key, "".join(parts))
+        except Exception as e:
+            yield f"Error communicating with LLM: {str(e)}"
+    
+    async def _route_to_llm_async(self, query: str, cacheable: bool = True) -> Dict[str, Any]:
+        """Async variant of _route_to_llm"""
+        key = self._cache_key(query)
+        if cacheable:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return {'type': 'llm', 'response': cached}
+        
+        try:
+            response = await self._async_client().chat.completions.create(**self._llm_request(query))
+            content = response.choices[0].message.content
+            if cacheable:
+                self._cache_put(key, content)
             
             return {
                 'type': 'llm',
-                'response': response.choices[0].message.content
+                'response': content
             }
         except Exception as e:
             return {
@@ -57,29 +217,64 @@ class Brain:
                 'response': f"Error communicating with LLM: {str(e)}"
             }
     
+    def _function_call_request(self, query: str, available_functions: list) -> Dict[str, Any]:
+        """Build the chat completion arguments for module selection
+        
+        Picking a module is a short classification task, so a small model is used.
+        """
+        return {
+            'model': "gpt-4o-mini",
+            'messages': [{"role": "user", "content": query}],
+            'tools': [{"type": "function", "function": f} for f in available_functions],
+            'tool_choice': "auto",
+            'max_tokens': 150
+        }
+    
+    def _parse_function_call(self, response) -> Dict[str, Any]:
+        """Turn a tool calling response into a result dict with parsed arguments"""
+        message = response.choices[0].message
+        
+        if message.tool_calls:
+            function_call = message.tool_calls[0].function
+            return {
+                'type': 'function_call',
+                'function': function_call.name,
+                'arguments': orjson.loads(function_call.arguments)
+            }
+        else:
+            return {
+                'type': 'llm',
+                'response': message.content
+            }
+    
     def function_call_to_llm(self, query: str, available_functions: list) -> Dict[str, Any]:
-        """Use OpenAI function calling to determine which module to invoke"""
+        """Use OpenAI function calling to determine which module to invoke
+        
+        For a 'function_call' result, 'arguments' is the parsed dict (no longer the
+        raw JSON string); malformed argument JSON returns the 'error' result.
+        """
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": query}],
-                functions=available_functions,
-                function_call="auto"
+                **self._function_call_request(query, available_functions)
             )
-            
-            message = response.choices[0].message
-            
-            if message.function_call:
-                return {
-                    'type': 'function_call',
-                    'function': message.function_call.name,
-                    'arguments': message.function_call.arguments
-                }
-            else:
-                return {
-                    'type': 'llm',
-                    'response': message.content
-                }
+            return self._parse_function_call(response)
+        except Exception as e:
+            return {
+                'type': 'error',
+                'response': f"Error with function calling: {str(e)}"
+            }
+    
+    async def afunction_call_to_llm(self, query: str, available_functions: list) -> Dict[str, Any]:
+        """Async variant of function_call_to_llm
+        
+        For a 'function_call' result, 'arguments' is the parsed dict; malformed
+        argument JSON returns the 'error' result.
+        """
+        try:
+            response = await self._async_client().chat.completions.create(
+                **self._function_call_request(query, available_functions)
+            )
+            return self._parse_function_call(response)
         except Exception as e:
             return {
                 'type': 'error',
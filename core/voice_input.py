@@ -1,39 +1,395 @@
 """Voice Input Module - Speech-to-Text using Whisper"""
 
-import whisper
+import importlib.util
+import numpy as np
 import pyaudio
 import wave
 import tempfile
-import os
+import threading
+import time
+import webrtcvad
 from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Quantized GGML models used by the whisper.cpp backend (downloaded by pywhispercpp)
+CPP_MODELS = {
+    "tiny": "tiny.en-q5_1",
+    "base": "base.en-q5_1",
+    "small": "small.en-q5_1",
+    "medium": "medium.en-q5_0",
+    "large": "large-v3-q5_0",
+}
+
 class VoiceInput:
-    def __init__(self, model_size: str = "base"):
+    BACKENDS = ("faster", "cpp", "torch")
+    QUALITIES = ("fast", "accurate")
+    
+    def __init__(self, model_size: str = "base", backend: str = "auto", quality: str = "fast",
+                 idle_timeout: Optional[float] = 30.0):
         """Initialize Whisper model for STT
         
+        The model is loaded on a background thread so the rest of the app can
+        start up meanwhile; the first transcription waits for it if needed.
+        
         Args:
             model_size: Whisper model size (tiny, base, small, medium, large)
+            backend: Inference backend:
+                'faster' - faster-whisper (CTranslate2) with int8 weights
+                'cpp'    - whisper.cpp via pywhispercpp with quantized GGML weights,
+                           best for CPU-only / embedded devices (English models)
+                'torch'  - reference openai-whisper PyTorch model
+                'auto'   - faster-whisper if installed, else PyTorch when CUDA
+                           is available, else whisper.cpp
+            quality: 'fast' decodes greedily without conditioning on previous
+                text (plenty for short commands); 'accurate' enables beam search.
+                Not used by the whisper.cpp backend.
+            idle_timeout: Seconds without transcription after which a GPU model is
+                moved off the GPU to free VRAM (None to keep it resident). The
+                first transcription after that is slower while it moves back.
         """
-        logger.info(f"Loading Whisper {model_size} model...")
-        self.model = whisper.load_model(model_size)
-        logger.info("Whisper model loaded successfully")
+        if quality not in self.QUALITIES:
+            raise ValueError(f"Unknown quality: {quality}")
+        if backend != "auto" and backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        
+        self.model_size = model_size
+        # 'auto' is resolved on the loading thread (probing CUDA imports torch)
+        self.backend = backend
+        self.quality = quality
+        self.idle_timeout = idle_timeout
+        self._device = None
+        self._idle = False
+        self._idle_timer = None
+        self._last_used = 0.0
+        
+        # Start loading the model first so it overlaps with audio device setup
+        self._model = None
+        # Reentrant: held across a transcription, which may itself load the model
+        self._model_lock = threading.RLock()
+        self._warm = threading.Thread(target=self._load, daemon=True)
+        self._warm.start()
         
         # Audio recording parameters
-        self.CHUNK = 1024
+        # VAD runs on the live stream, so each chunk adds up to its length to
+        # end-of-speech detection. 1280 frames (80ms, four 20ms VAD frames) keeps
+        # that small while making fewer stream callbacks than 1024-frame chunks
+        self.CHUNK = 1280
         self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 1
         self.RATE = 16000
         
-    def record_audio(self, duration: int = 5, filename: Optional[str] = None) -> str:
+        # Voice activity detection parameters (webrtcvad accepts 10/20/30ms frames)
+        self.VAD_FRAME_MS = 20
+        self.VAD_PREROLL_MS = 200
+        self.VAD_SILENCE_MS = 500
+        self._vad = webrtcvad.Vad(2)
+        
+        # PortAudio is initialized once and reused for every recording
+        self._pa = pyaudio.PyAudio()
+        self._sample_width = self._pa.get_sample_size(self.FORMAT)
+        
+        # The input stream is opened on first use and then only started/stopped;
+        # the stream callback hands each chunk to the active sink: the buffer of
+        # the recording in progress, or the ring buffer of continuous_listen
+        self._stream = None
+        self._stream_lock = threading.Lock()
+        self._ready = threading.Condition()
+        self._sink = None
+        self._record_view = None
+        self._record_offset = 0
+        self._ring = np.zeros(self.RATE * 30, dtype=np.int16)
+        self._ring_written = 0
+        self._stop_listening = threading.Event()
+    
+    @staticmethod
+    def _resolve_auto_backend() -> str:
+        """Pick a concrete backend for 'auto' based on what is installed"""
+        if importlib.util.find_spec("faster_whisper"):
+            return "faster"
+        if importlib.util.find_spec("torch"):
+            import torch
+            if torch.cuda.is_available():
+                return "torch"
+        if importlib.util.find_spec("pywhispercpp"):
+            return "cpp"
+        return "torch"
+    
+    def _load(self):
+        """Load the Whisper model and run a dummy decode to warm it up"""
+        with self._model_lock:
+            if self._model is not None:
+                return
+            
+            if self.backend == "auto":
+                self.backend = self._resolve_auto_backend()
+            
+            logger.info(f"Loading Whisper {self.model_size} model ({self.backend} backend)...")
+            
+            if self.backend == "faster":
+                from faster_whisper import WhisperModel
+                model = WhisperModel(self.model_size, device="auto", compute_type="int8")
+                self._device = model.model.device
+            elif self.backend == "cpp":
+                from pywhispercpp.model import Model
+                model = Model(CPP_MODELS.get(self.model_size, self.model_size))
+            else:
+                import torch
+                import whisper
+                self._device = "cuda" if torch.cuda.is_available() else "cpu"
+                model = whisper.load_model(self.model_size, device=self._device)
+            
+            # One second of silence (Whisper takes 16kHz input) triggers kernel
+            # selection / allocations up front
+            self._run_model(model, np.zeros(16000, dtype=np.float32), "en", vad_filter=False)
+            
+            self._model = model
+            logger.info("Whisper model loaded successfully")
+    
+    def _run_model(self, model, audio, language: str, vad_filter: bool = True) -> str:
+        """Transcribe a file path or float32 sample array with the active backend"""
+        fast = self.quality == "fast"
+        
+        if self.backend == "faster":
+            # vad_filter skips silent regions so they never reach the decoder
+            segments, _ = model.transcribe(
+                audio,
+                language=language,
+                beam_size=1 if fast else 5,
+                vad_filter=vad_filter
+            )
+            return "".join(segment.text for segment in segments).strip()
+        elif self.backend == "cpp":
+            segments = model.transcribe(audio, language=language)
+            return "".join(segment.text for segment in segments).strip()
+        else:
+            # fp16 halves the bytes moved through the decoder on GPU
+            options = {'language': language, 'fp16': self._device == "cuda"}
+            if fast:
+                # Single greedy pass, no temperature fallback
+                options.update(temperature=0.0, condition_on_previous_text=False)
+            else:
+                options.update(beam_size=5, best_of=5)
+            result = model.transcribe(audio, **options)
+            return result["text"].strip()
+    
+    @property
+    def model(self):
+        """Whisper model, waiting for the background load to finish if necessary"""
+        if self._model is None:
+            self._warm.join()
+            if self._model is None:
+                # Background load failed; retry here so the error reaches the caller
+                self._load()
+        return self._model
+        
+    def _idle_if_unused(self):
+        """Idle timer target: idle() unless the model was used since it was armed
+        
+        A timer that fires during a decode waits for the model lock and would
+        otherwise evict the model right after that decode.
+        """
+        with self._model_lock:
+            if time.monotonic() - self._last_used >= self.idle_timeout:
+                self.idle()
+    
+    def idle(self):
+        """Move a GPU model to CPU memory and release its VRAM
+        
+        Called automatically after idle_timeout; transcription calls active().
+        """
+        with self._model_lock:
+            if self._model is None or self._idle or self._device != "cuda":
+                return
+            
+            if self.backend == "faster":
+                self._model.model.unload_model(to_cpu=True)
+            else:
+                import torch
+                self._model.to("cpu")
+                torch.cuda.empty_cache()
+            
+            self._idle = True
+            logger.info("Whisper model moved off the GPU")
+    
+    def active(self):
+        """Move the model back onto the GPU after idle()"""
+        with self._model_lock:
+            if not self._idle:
+                return
+            
+            if self.backend == "faster":
+                self._model.model.load_model()
+            else:
+                self._model.to(self._device)
+            
+            self._idle = False
+            logger.info("Whisper model moved back to the GPU")
+    
+    def close(self):
+        """Release the audio device; the instance can't record afterwards"""
+        with self._stream_lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+            if self._pa is not None:
+                self._pa.terminate()
+                self._pa = None
+    
+    def __del__(self):
+        # __init__ may have failed before the PyAudio instance was created
+        if getattr(self, '_pa', None) is not None:
+            self.close()
+    
+    def _input_stream(self):
+        """Open the (stopped) microphone stream on first use"""
+        if self._stream is None:
+            self._stream = self._pa.open(
+                format=self.FORMAT,
+                channels=self.CHANNELS,
+                rate=self.RATE,
+                input=True,
+                frames_per_buffer=self.CHUNK,
+                stream_callback=self._on_audio,
+                start=False
+            )
+        return self._stream
+    
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """Stream callback: pass each chunk to the active sink"""
+        with self._ready:
+            if self._sink is not None:
+                self._sink(in_data)
+                self._ready.notify()
+        return (None, pyaudio.paContinue)
+    
+    def _write_recording(self, in_data):
+        """Sink: copy a chunk straight into the preallocated recording buffer"""
+        view = self._record_view
+        offset = self._record_offset
+        n = min(len(in_data), len(view) - offset)
+        view[offset:offset + n] = in_data[:n]
+        self._record_offset = offset + n
+    
+    def _write_ring(self, in_data):
+        """Sink: append a chunk to the ring buffer, overwriting the oldest audio"""
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        size = len(self._ring)
+        position = self._ring_written % size
+        first = min(len(samples), size - position)
+        self._ring[position:position + first] = samples[:first]
+        self._ring[:len(samples) - first] = samples[first:]
+        self._ring_written += len(samples)
+    
+    def _ring_slice(self, start: int, end: int) -> np.ndarray:
+        """Samples [start, end) of the ring buffer, in absolute sample positions
+        
+        Returns a view when the range doesn't wrap around, otherwise a copy.
+        """
+        size = len(self._ring)
+        first = start % size
+        last = first + (end - start)
+        if last <= size:
+            return self._ring[first:last]
+        return np.concatenate((self._ring[first:], self._ring[:last - size]))
+    
+    def record_pcm(self, duration: int = 5, stop_on_silence: bool = True) -> memoryview:
+        """Record audio from microphone into memory
+        
+        With stop_on_silence, recording is gated by voice activity detection: the
+        result starts shortly before the first speech and recording stops once
+        the speaker has been silent for VAD_SILENCE_MS, so Whisper never has to
+        decode the unused rest of the window.
+        
+        Args:
+            duration: Recording duration in seconds (maximum when stop_on_silence)
+            stop_on_silence: Stop at end of speech instead of after the full duration
+            
+        Returns:
+            Raw 16-bit mono PCM samples at self.RATE (empty if no speech was heard)
+        """
+        with self._stream_lock:
+            logger.info(f"Recording for up to {duration} seconds..." if stop_on_silence
+                        else f"Recording for {duration} seconds...")
+            
+            stream = self._input_stream()
+            
+            # Preallocated buffer the stream callback fills
+            view = memoryview(bytearray(int(self.RATE * duration) * self._sample_width * self.CHANNELS))
+            with self._ready:
+                self._record_view = view
+                self._record_offset = 0
+                self._sink = self._write_recording
+            
+            stream.start_stream()
+            try:
+                if stop_on_silence:
+                    start, end = self._detect_speech(view, stream)
+                else:
+                    start, end = 0, len(view)
+                    with self._ready:
+                        while self._record_offset < len(view) and stream.is_active():
+                            self._ready.wait(0.1)
+            finally:
+                stream.stop_stream()
+                with self._ready:
+                    self._sink = None
+                    self._record_view = None
+                    recorded = self._record_offset
+            
+            end = min(end, recorded)
+            logger.info("Recording finished")
+            
+            return view[start:end]
+    
+    def _detect_speech(self, view: memoryview, stream):
+        """Run VAD over the recording as it fills; return the speech byte range
+        
+        Returns once VAD_SILENCE_MS of silence follows speech or the buffer is full.
+        """
+        frame_bytes = self.RATE * self.VAD_FRAME_MS // 1000 * self._sample_width
+        preroll_bytes = self.VAD_PREROLL_MS // self.VAD_FRAME_MS * frame_bytes
+        max_silent_frames = self.VAD_SILENCE_MS // self.VAD_FRAME_MS
+        speech_start = None
+        silent_frames = 0
+        position = 0
+        
+        while True:
+            with self._ready:
+                while (self._record_offset - position < frame_bytes
+                       and self._record_offset < len(view) and stream.is_active()):
+                    self._ready.wait(0.1)
+                available = self._record_offset
+            if available - position < frame_bytes:
+                # Window is full: keep whatever speech was captured
+                break
+            
+            while available - position >= frame_bytes:
+                frame = view[position:position + frame_bytes]
+                position += frame_bytes
+                if self._vad.is_speech(frame, self.RATE):
+                    if speech_start is None:
+                        speech_start = max(0, position - frame_bytes - preroll_bytes)
+                    silent_frames = 0
+                elif speech_start is not None:
+                    silent_frames += 1
+                    if silent_frames > max_silent_frames:
+                        return speech_start, position
+        
+        if speech_start is None:
+            return 0, 0
+        return speech_start, len(view)
+    
+    def record_audio(self, duration: int = 5, filename: Optional[str] = None,
+                     stop_on_silence: bool = True) -> str:
         """Record audio from microphone
         
         Args:
-            duration: Recording duration in seconds
+            duration: Recording duration in seconds (maximum when stop_on_silence)
             filename: Output filename (creates temp file if None)
+            stop_on_silence: Stop at end of speech instead of after the full duration
             
         Returns:
             Path to recorded audio file
@@ -43,40 +399,36 @@ class VoiceInput:
             filename = temp_file.name
             temp_file.close()
         
-        logger.info(f"Recording for {duration} seconds...")
-        
-        audio = pyaudio.PyAudio()
-        
-        stream = audio.open(
-            format=self.FORMAT,
-            channels=self.CHANNELS,
-            rate=self.RATE,
-            input=True,
-            frames_per_buffer=self.CHUNK
-        )
-        
-        frames = []
-        
-        for _ in range(0, int(self.RATE / self.CHUNK * duration)):
-            data = stream.read(self.CHUNK)
-            frames.append(data)
-        
-        logger.info("Recording finished")
-        
-        stream.stop_stream()
-        stream.close()
-        audio.terminate()
+        pcm = self.record_pcm(duration, stop_on_silence)
         
         # Save recording
         wf = wave.open(filename, 'wb')
         wf.setnchannels(self.CHANNELS)
-        wf.setsampwidth(audio.get_sample_size(self.FORMAT))
+        wf.setsampwidth(self._sample_width)
         wf.setframerate(self.RATE)
-        wf.writeframes(b''.join(frames))
+        wf.writeframes(pcm)
         wf.close()
         
         return filename
     
+    def _decode(self, audio, language: str) -> str:
+        """Run Whisper on a file path or float32 sample array"""
+        model = self.model
+        with self._model_lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+            self.active()
+            text = self._run_model(model, audio, language)
+            self._last_used = time.monotonic()
+            
+            if self.idle_timeout is not None and self._device == "cuda":
+                self._idle_timer = threading.Timer(self.idle_timeout, self._idle_if_unused)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+        
+        logger.info(f"Transcription: {text}")
+        return text
+    
     def transcribe(self, audio_path: str, language: str = "en") -> str:
         """Transcribe audio file to text using Whisper
         
@@ -88,40 +440,146 @@ class VoiceInput:
             Transcribed text
         """
         logger.info(f"Transcribing {audio_path}...")
+        return self._decode(audio_path, language)
+    
+    def transcribe_array(self, pcm_bytes, language: str = "en") -> str:
+        """Transcribe in-memory audio without going through a file and ffmpeg
         
-        result = self.model.transcribe(audio_path, language=language)
-        text = result["text"].strip()
+        Args:
+            pcm_bytes: Raw 16-bit mono PCM samples at self.RATE
+            language: Language code (e.g., 'en', 'es', 'fr')
+            
+        Returns:
+            Transcribed text
+        """
+        if not len(pcm_bytes):
+            return ""
         
-        logger.info(f"Transcription: {text}")
-        return text
+        logger.info("Transcribing recorded audio...")
+        
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) * (1.0 / 32768.0)
+        return self._decode(samples, language)
     
-    def listen_and_transcribe(self, duration: int = 5, language: str = "en") -> str:
+    def listen_and_transcribe(self, duration: int = 5, language: str = "en",
+                              stop_on_silence: bool = True) -> str:
         """Record audio and transcribe in one step
         
         Args:
-            duration: Recording duration in seconds
+            duration: Recording duration in seconds (maximum when stop_on_silence)
             language: Language code
+            stop_on_silence: Stop at end of speech instead of after the full duration
             
         Returns:
             Transcribed text
         """
-        audio_path = self.record_audio(duration)
-        
-        try:
-            text = self.transcribe(audio_path, language)
-            return text
-        finally:
-            # Clean up temp file
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
+        return self.transcribe_array(self.record_pcm(duration, stop_on_silence), language)
     
-    def continuous_listen(self, callback, silence_threshold: float = 0.5):
+    def continuous_listen(self, callback, silence_threshold: float = 0.5,
+                          energy_threshold: float = 200.0, language: str = "en"):
         """Continuously listen for voice input (for future wake-word integration)
         
+        Audio is captured into a 30 second ring buffer and scanned in VAD frames:
+        a cheap vectorized RMS gate rejects quiet frames before webrtcvad looks at
+        them. Each utterance is transcribed straight from memory and passed to
+        callback. Blocks until stop_listening() is called.
+        
+        The microphone is paused while an utterance is transcribed and callback
+        runs, so callback may itself record (e.g. ask a follow-up question).
+        
         Args:
             callback: Function to call with transcribed text
-            silence_threshold: Threshold for detecting silence
+            silence_threshold: Seconds of silence that end an utterance
+            energy_threshold: Minimum frame RMS (16-bit sample units) to count as voice
+            language: Language code
         """
-        # TODO: Implement VAD (Voice Activity Detection) and wake-word detection
-        # This will be integrated with Porcupine for wake-word functionality
-        pass
+        frame = self.RATE * self.VAD_FRAME_MS // 1000
+        max_silent_frames = int(silence_threshold * 1000) // self.VAD_FRAME_MS
+        # Cap utterances so that, with the trailing silence and a second of
+        # headroom, they never wrap around the ring while being cut out
+        max_utterance = len(self._ring) - self.RATE - max_silent_frames * frame
+        if max_utterance < self.RATE:
+            raise ValueError(f"silence_threshold too long: {silence_threshold}")
+        
+        self._stop_listening.clear()
+        logger.info("Listening continuously...")
+        
+        while not self._stop_listening.is_set():
+            pcm = self._capture_utterance(energy_threshold, max_silent_frames, max_utterance)
+            if pcm is None:
+                break
+            
+            text = self.transcribe_array(pcm, language)
+            if text:
+                callback(text)
+        
+        logger.info("Stopped listening")
+    
+    def _capture_utterance(self, energy_threshold: float, max_silent_frames: int,
+                           max_utterance: int) -> Optional[np.ndarray]:
+        """Record into the ring buffer until one utterance is complete
+        
+        Returns a copy of the utterance samples, or None once stop_listening()
+        was called or the stream stopped.
+        """
+        frame = self.RATE * self.VAD_FRAME_MS // 1000
+        preroll = self.VAD_PREROLL_MS // self.VAD_FRAME_MS * frame
+        
+        with self._stream_lock:
+            stream = self._input_stream()
+            with self._ready:
+                self._ring_written = 0
+                self._sink = self._write_ring
+            
+            stream.start_stream()
+            try:
+                speech_start = None
+                silent_frames = 0
+                position = 0
+                
+                while not self._stop_listening.is_set():
+                    with self._ready:
+                        while (self._ring_written - position < frame
+                               and not self._stop_listening.is_set() and stream.is_active()):
+                            self._ready.wait(0.1)
+                        written = self._ring_written
+                    if not stream.is_active():
+                        break
+                    
+                    if written - position > max_utterance:
+                        # Fell too far behind; drop the overwritten audio
+                        position = written - written % frame
+                        speech_start = None
+                        silent_frames = 0
+                    
+                    while written - position >= frame:
+                        samples = self._ring_slice(position, position + frame)
+                        position += frame
+                        
+                        energy = samples.astype(np.float32)
+                        voiced = (np.sqrt(energy.dot(energy) / frame) >= energy_threshold
+                                  and self._vad.is_speech(samples.tobytes(), self.RATE))
+                        
+                        if voiced:
+                            if speech_start is None:
+                                speech_start = max(0, position - frame - preroll)
+                            silent_frames = 0
+                            if position - speech_start < max_utterance:
+                                continue
+                        elif speech_start is None:
+                            continue
+                        else:
+                            silent_frames += 1
+                            if silent_frames <= max_silent_frames:
+                                continue
+                        
+                        # End of utterance (or maximum length reached)
+                        return self._ring_slice(speech_start, position).copy()
+                return None
+            finally:
+                stream.stop_stream()
+                with self._ready:
+                    self._sink = None
+    
+    def stop_listening(self):
+        """Make a running continuous_listen return"""
+        self._stop_listening.set()
@@ -1,18 +1,30 @@
 """Voice Output Module - Text-to-Speech"""
 
+import re
 import pyttsx3
+import sounddevice as sd
 import logging
-from typing import Optional
+import queue
+import threading
+from typing import Optional, Iterable
 from openai import OpenAI
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Whitespace following sentence-ending punctuation
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
 class VoiceOutput:
     def __init__(self, engine_type: str = "pyttsx3", openai_api_key: Optional[str] = None):
         """Initialize TTS engine
         
+        Speech runs on a dedicated worker thread, so speak() only queues the text
+        and returns while the audio is played in the background. The worker
+        creates and drives the pyttsx3 engine itself: SAPI5 (COM) and
+        NSSpeechSynthesizer must be used from the thread that created them.
+        
         Args:
             engine_type: 'pyttsx3' for offline TTS or 'openai' for OpenAI TTS API
             openai_api_key: Required if using OpenAI TTS
@@ -20,15 +32,38 @@ class VoiceOutput:
         self.engine_type = engine_type
         
         if engine_type == "pyttsx3":
-            self.engine = pyttsx3.init()
-            self._configure_pyttsx3()
+            self.engine = None  # created on the worker thread
+            # Engine-specific implementations are bound once here instead of
+            # comparing engine_type on every call
+            self._speak_impl = self._speak_pyttsx3
+            self._set_rate_impl = self._set_rate_pyttsx3
+            self._set_volume_impl = self._set_volume_pyttsx3
         elif engine_type == "openai":
             if not openai_api_key:
                 raise ValueError("OpenAI API key required for OpenAI TTS")
             self.client = OpenAI(api_key=openai_api_key)
+            # OpenAI TTS returns 24kHz mono 16-bit PCM; keep one output stream open
+            self._audio_stream = sd.RawOutputStream(samplerate=24000, channels=1, dtype='int16')
+            self._audio_stream.start()
+            self._speak_impl = self._speak_openai
+            # Rate and volume are not adjustable for OpenAI TTS
+            self._set_rate_impl = self._ignore_setting
+            self._set_volume_impl = self._ignore_setting
         else:
             raise ValueError(f"Unknown engine type: {engine_type}")
         
+        # Queue items are (function, *args) calls run in order on the worker
+        self._queue = queue.Queue()
+        self._engine_ready = threading.Event()
+        self._engine_error = None
+        self._worker = threading.Thread(target=self._tts_loop, daemon=True)
+        self._worker.start()
+        
+        # Surface engine initialization errors to the caller
+        self._engine_ready.wait()
+        if self._engine_error is not None:
+            raise self._engine_error
+        
         logger.info(f"Voice output initialized with {engine_type}")
     
     def _configure_pyttsx3(self):
@@ -39,14 +74,39 @@ class VoiceOutput:
         
         # Get available voices and set a good one
         voices = self.engine.getProperty('voices')
-        # Prefer female voice if available
-        for voice in voices:
-            if 'female' in voice.name.lower() or 'zira' in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
-                break
+        names = {voice.name.lower(): voice.id for voice in voices}
+        # Prefer a female voice if available, in order of preference
+        for key in ('zira', 'female', 'samantha'):
+            for name, voice_id in names.items():
+                if key in name:
+                    self.engine.setProperty('voice', voice_id)
+                    return
+    
+    def _tts_loop(self):
+        """Worker thread: own the TTS engine and run queued calls one after another"""
+        try:
+            if self.engine_type == "pyttsx3":
+                self.engine = pyttsx3.init()
+                self._configure_pyttsx3()
+        except Exception as e:
+            self._engine_error = e
+            return
+        finally:
+            self._engine_ready.set()
+        
+        while True:
+            function, *args = self._queue.get()
+            try:
+                function(*args)
+            except Exception as e:
+                logger.error(f"TTS error: {e}")
+            finally:
+                self._queue.task_done()
     
     def speak(self, text: str):
-        """Speak text using configured TTS engine
+        """Queue text to be spoken by the configured TTS engine
+        
+        Returns immediately; use flush() to wait until it has been spoken.
         
         Args:
             text: Text to speak
@@ -54,41 +114,82 @@ class VoiceOutput:
         if not text:
             return
         
+        self._queue.put((self._speak, text))
+    
+    def _speak(self, text: str):
+        """Speak text on the worker thread"""
         logger.info(f"Speaking: {text}")
+        self._speak_impl(text)
+    
+    def speak_stream(self, chunks: Iterable[str]):
+        """Speak text that arrives in pieces, e.g. streamed LLM output
         
-        if self.engine_type == "pyttsx3":
-            self.engine.say(text)
-            self.engine.runAndWait()
-        elif self.engine_type == "openai":
-            self._speak_openai(text)
+        Each sentence is queued as soon as it is complete, so the first one is
+        spoken while the rest of the text is still being generated.
+        
+        Args:
+            chunks: Iterable of text fragments
+        """
+        pending = ""
+        for chunk in chunks:
+            pending += chunk
+            *sentences, pending = SENTENCE_END.split(pending)
+            for sentence in sentences:
+                self.speak(sentence)
+        
+        self.speak(pending.strip())
+    
+    def flush(self):
+        """Block until all queued text has been spoken and settings applied"""
+        self._queue.join()
+    
+    def _speak_pyttsx3(self, text: str):
+        """Speak text with the offline pyttsx3 engine"""
+        self.engine.say(text)
+        self.engine.runAndWait()
     
     def _speak_openai(self, text: str, voice: str = "alloy"):
         """Use OpenAI TTS API for high-quality voice output
         
+        Audio is requested as raw PCM and played chunk by chunk as it arrives,
+        so playback starts after the first chunk rather than the full synthesis.
+        
         Args:
             text: Text to speak  
             voice: OpenAI voice (alloy, echo, fable, onyx, nova, shimmer)
         """
         try:
-            response = self.client.audio.speech.create(
+            with self.client.audio.speech.with_streaming_response.create(
                 model="tts-1",
                 voice=voice,
-                input=text
-            )
+                input=text,
+                response_format="pcm"
+            ) as response:
+                for chunk in response.iter_bytes(4096):
+                    self._audio_stream.write(chunk)
             
-            # Play audio (simplified - would need proper audio player)
-            response.stream_to_file("output.mp3")
-            # TODO: Play MP3 file using pygame or similar
-            logger.info("OpenAI TTS audio generated")
+            logger.info("OpenAI TTS audio played")
         except Exception as e:
             logger.error(f"OpenAI TTS error: {e}")
     
+    # Property changes go through the queue so they reach the engine on its own
+    # thread, between utterances
+    def _set_rate_pyttsx3(self, rate: int):
+        self._queue.put((self._set_property, 'rate', rate))
+    
+    def _set_volume_pyttsx3(self, volume: float):
+        self._queue.put((self._set_property, 'volume', volume))
+    
+    def _set_property(self, name: str, value):
+        self.engine.setProperty(name, value)
+    
+    def _ignore_setting(self, value):
+        pass
+    
     def set_rate(self, rate: int):
         """Set speech rate (words per minute)"""
-        if self.engine_type == "pyttsx3":
-            self.engine.setProperty('rate', rate)
+        self._set_rate_impl(rate)
     
     def set_volume(self, volume: float):
         """Set volume (0.0 to 1.0)"""
-        if self.engine_type == "pyttsx3":
-            self.engine.setProperty('volume', volume)
+        self._set_volume_impl(volume)
@@ -0,0 +1,64 @@
+"""Stand-ins for hardware / network dependencies that may not be installed
+
+Real packages are used when available; only missing ones are replaced.
+"""
+
+import importlib.util
+import json
+import sys
+import types
+
+
+def _stub(name, **attributes):
+    if importlib.util.find_spec(name) is None and name not in sys.modules:
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+
+
+class _Client:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class _PyAudio:
+    def get_sample_size(self, format):
+        return 2
+
+    def terminate(self):
+        pass
+
+
+class _Vad:
+    def __init__(self, mode=None):
+        pass
+
+    def is_speech(self, buf, sample_rate, length=None):
+        return False
+
+
+class _Engine:
+    def __init__(self):
+        self.spoken = []
+        self.properties = {'voices': []}
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties[name]
+
+    def say(self, text):
+        self.spoken.append(text)
+
+    def runAndWait(self):
+        pass
+
+
+_stub("openai", OpenAI=_Client, AsyncOpenAI=_Client)
+_stub("orjson", loads=json.loads)
+_stub("pyaudio", paInt16=8, paContinue=0, paComplete=1, PyAudio=_PyAudio,
+      get_sample_size=lambda format: 2)
+_stub("webrtcvad", Vad=_Vad)
+_stub("pyttsx3", init=_Engine)
+_stub("sounddevice")
@@ -0,0 +1,115 @@
+import re
+import time
+import types
+
+import pytest
+
+from core.brain import Brain
+
+
+@pytest.fixture
+def brain():
+    return Brain(openai_api_key="test")
+
+
+def register(brain, name, patterns):
+    brain.register_module(name, patterns, lambda query: name)
+
+
+def matched(brain, query):
+    result = brain._match_command(query)
+    return result and result['response']
+
+
+def test_first_registered_pattern_wins(brain):
+    register(brain, 'music', [r'play (\w+)'])
+    register(brain, 'notion', [r'^open', r'notion'])
+
+    # 'open' appears earlier in the query, but music was registered first
+    assert matched(brain, 'open notion and play music') == 'music'
+    assert matched(brain, 'OPEN my notes') == 'notion'
+    assert matched(brain, 'hello') is None
+
+
+def test_backreference_pattern_still_works(brain):
+    register(brain, 'first', [r'zzz'])
+    register(brain, 'double', [r'(\w)\1y'])
+    register(brain, 'last', [r'ally'])
+
+    assert matched(brain, 'a silly one') == 'double'
+    assert matched(brain, 'zzz ally') == 'first'
+
+
+def test_inline_flag_pattern_still_works(brain):
+    register(brain, 'dots', [r'(?s)a.b'])
+    register(brain, 'zap', [r'zap'])
+
+    assert matched(brain, 'a\nb') == 'dots'
+    assert matched(brain, 'ZAP') == 'zap'
+
+
+def test_duplicate_group_names(brain):
+    register(brain, 'foo', [r'(?P<thing>foo)'])
+    register(brain, 'bar', [r'(?P<thing>bar)'])
+
+    assert matched(brain, 'bar foo') == 'foo'
+    assert matched(brain, 'just bar') == 'bar'
+
+
+def test_invalid_pattern_fails_at_registration(brain):
+    with pytest.raises(re.error):
+        register(brain, 'broken', [r'(unclosed'])
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = types.SimpleNamespace(content=f"answer {self.calls}")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def completions(brain):
+    completions = FakeCompletions()
+    brain.client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    return completions
+
+
+def test_llm_response_is_cached_by_normalized_query(brain, completions):
+    assert brain._route_to_llm("What time is it")['response'] == "answer 1"
+    assert brain._route_to_llm("  what time is it ")['response'] == "answer 1"
+    assert completions.calls == 1
+
+
+def test_uncacheable_query_bypasses_cache(brain, completions):
+    brain._route_to_llm("tell me a joke")
+    assert brain._route_to_llm("tell me a joke", cacheable=False)['response'] == "answer 2"
+    assert completions.calls == 2
+
+
+def test_cache_evicts_least_recently_used():
+    brain = Brain(openai_api_key="test", cache_size=2)
+    for query in ("a", "b"):
+        brain._cache_put(brain._cache_key(query), query)
+    brain._cache_get(brain._cache_key("a"))
+    brain._cache_put(brain._cache_key("c"), "c")
+
+    assert brain._cache_get(brain._cache_key("a")) == "a"
+    assert brain._cache_get(brain._cache_key("b")) is None
+    assert brain._cache_get(brain._cache_key("c")) == "c"
+
+
+def test_cache_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    brain = Brain(openai_api_key="test", cache_ttl=60)
+    key = brain._cache_key("status")
+    brain._cache_put(key, "all good")
+
+    now[0] += 59
+    assert brain._cache_get(key) == "all good"
+    now[0] += 2
+    assert brain._cache_get(key) is None
@@ -0,0 +1,187 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.voice_input import VoiceInput
+
+
+@pytest.fixture
+def voice_input(monkeypatch):
+    # No Whisper model is needed for the buffer logic
+    monkeypatch.setattr(VoiceInput, "_load", lambda self: None)
+    return VoiceInput(backend="cpp")
+
+
+@pytest.fixture
+def small_ring(voice_input):
+    voice_input._ring = np.zeros(10, dtype=np.int16)
+    return voice_input
+
+
+def write(voice_input, samples):
+    voice_input._write_ring(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def test_ring_slice_without_wraparound(small_ring):
+    voice_input = small_ring
+    write(voice_input, range(1, 7))
+
+    assert voice_input._ring_slice(2, 5).tolist() == [3, 4, 5]
+    assert voice_input._ring_written == 6
+
+
+def test_ring_write_and_slice_wrap_around(small_ring):
+    voice_input = small_ring
+    write(voice_input, range(1, 9))
+    write(voice_input, range(9, 15))
+
+    # Samples 1-4 were overwritten by 11-14
+    assert voice_input._ring[:4].tolist() == [11, 12, 13, 14]
+    assert voice_input._ring_slice(6, 14).tolist() == list(range(7, 15))
+
+
+def test_continuous_listen_rejects_silence_longer_than_ring(voice_input):
+    with pytest.raises(ValueError):
+        voice_input.continuous_listen(lambda text: None, silence_threshold=29.5)
+
+
+SPEECH = 1000
+
+
+def tone(seconds, level=0):
+    return np.full(int(16000 * seconds), level, dtype=np.int16)
+
+
+def chunks(*parts, size=1280):
+    signal = np.concatenate(parts)
+    return [signal[i:i + size] for i in range(0, len(signal), size)]
+
+
+class FakeVad:
+    """Counts 20ms frames; any non-zero sample counts as speech"""
+
+    def __init__(self):
+        self.frames = 0
+        self.analysed = threading.Condition()
+
+    def is_speech(self, buf, sample_rate, length=None):
+        assert len(buf) == 640 and sample_rate == 16000
+        with self.analysed:
+            self.frames += 1
+            self.analysed.notify_all()
+        return any(bytes(buf))
+
+
+class FakeStream:
+    """Feeds chunks to the stream callback, in lockstep with the VAD
+
+    Chunks longer than CHUNK are delivered at once without being analysed, to
+    simulate the listener falling behind.
+    """
+
+    def __init__(self, voice_input, chunks):
+        self.voice_input = voice_input
+        self.vad = voice_input._vad
+        self.chunks = list(chunks)
+        self.expected_frames = 0
+        self.active = False
+        self.thread = None
+
+    def _feed(self):
+        while self.active and self.chunks:
+            chunk = self.chunks.pop(0)
+            self.voice_input._on_audio(chunk.tobytes(), len(chunk), None, 0)
+            if len(chunk) > self.voice_input.CHUNK:
+                # Give the listener time to notice the overrun and skip ahead
+                time.sleep(0.2)
+                continue
+            self.expected_frames += len(chunk) // 320
+            with self.vad.analysed:
+                self.vad.analysed.wait_for(
+                    lambda: self.vad.frames >= self.expected_frames or not self.active, timeout=5)
+        self.active = False
+
+    def start_stream(self):
+        self.active = True
+        self.thread = threading.Thread(target=self._feed, daemon=True)
+        self.thread.start()
+
+    def stop_stream(self):
+        self.active = False
+        with self.vad.analysed:
+            self.vad.analysed.notify_all()
+        self.thread.join()
+
+    def is_active(self):
+        return self.active
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def microphone(voice_input):
+    """Install a fake VAD and return a function that queues fake input chunks"""
+    voice_input._vad = FakeVad()
+
+    def feed(chunks):
+        voice_input._stream = FakeStream(voice_input, chunks)
+        return voice_input._stream
+
+    return feed
+
+
+def test_record_pcm_keeps_speech_with_preroll_and_hangover(voice_input, microphone):
+    microphone(chunks(tone(1), tone(1, SPEECH), tone(2)))
+
+    pcm = np.frombuffer(voice_input.record_pcm(5), dtype=np.int16)
+
+    # 200ms pre-roll + 1s speech + 26 silent 20ms frames
+    assert len(pcm) == 3200 + 16000 + 26 * 320
+    assert not pcm[:3200].any() and (pcm[3200:19200] == SPEECH).all()
+
+
+def test_record_pcm_without_speech_is_empty(voice_input, microphone):
+    microphone(chunks(tone(1)))
+
+    assert len(voice_input.record_pcm(1)) == 0
+
+
+def test_record_pcm_interrupt_propagates_and_stops_stream(voice_input, microphone, monkeypatch):
+    stream = microphone(chunks(tone(1)))
+
+    def interrupt(view, stream):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(voice_input, "_detect_speech", interrupt)
+
+    with pytest.raises(KeyboardInterrupt):
+        voice_input.record_pcm(1)
+    assert not stream.is_active()
+    assert voice_input._sink is None
+
+
+@pytest.mark.parametrize("fed, lengths", [
+    # Utterance ends after the silence hangover: pre-roll + speech + 26 frames
+    (chunks(tone(1), tone(1, SPEECH), tone(1)), [3200 + 16000 + 26 * 320]),
+    # Non-stop speech is cut at max_utterance: 4s ring - 1s headroom - 25 frames
+    (chunks(tone(0.5), tone(3, SPEECH), tone(1)), [64000 - 16000 - 25 * 320]),
+    # A burst the listener can't keep up with is dropped, not transcribed
+    ([tone(3, SPEECH)] + chunks(tone(0.5), tone(1, SPEECH), tone(1)), [3200 + 16000 + 26 * 320]),
+])
+def test_continuous_listen_cuts_utterances(voice_input, microphone, fed, lengths):
+    voice_input._ring = np.zeros(4 * 16000, dtype=np.int16)
+    microphone(fed)
+    transcribed = []
+
+    def transcribe_array(pcm, language):
+        transcribed.append(len(pcm))
+        voice_input.stop_listening()
+        return ""
+    voice_input.transcribe_array = transcribe_array
+
+    voice_input.continuous_listen(lambda text: None, energy_threshold=0)
+
+    assert transcribed == lengths
@@ -0,0 +1,27 @@
+import pytest
+
+from core.voice_output import VoiceOutput
+
+
+@pytest.fixture
+def spoken(monkeypatch):
+    """Texts handed to the TTS engine, in order"""
+    texts = []
+    monkeypatch.setattr(VoiceOutput, "_speak_pyttsx3", lambda self, text: texts.append(text))
+    return texts
+
+
+def test_speak_stream_splits_at_sentence_ends(spoken):
+    output = VoiceOutput()
+    output.speak_stream(["Hel", "lo there. Pi is 3", ".14! Ok", " done?", "  tail"])
+    output.flush()
+
+    assert spoken == ["Hello there.", "Pi is 3.14!", "Ok done?", "tail"]
+
+
+def test_speak_stream_without_trailing_text(spoken):
+    output = VoiceOutput()
+    output.speak_stream(["One. ", "Two.", " "])
+    output.flush()
+
+    assert spoken == ["One.", "Two."]